@@ -1,210 +1,282 @@
 import streamlit as st
 import os
-from dotenv import load_dotenv
-from market_research.crew_setup import MarketResearchCrew, LLM
-from market_research.report_generator import generate_report_file, generate_report_title
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, Callable, Optional
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+from crewai import LLM
+from market_research.report_generator import generate_report_file, generate_report_title, get_current_date
 from market_research.utils import *
-import re
 
 # Load environment variables
-load_dotenv()
+load_environment()
+
+if TYPE_CHECKING:
+    from market_research.crew_setup import MarketResearchCrew
+
+# Reports longer than this (in characters) are shown as plain text by default
+LARGE_REPORT_CHARS = 200_000
+
+# Reports longer than this have all but their first few sections collapsed
+COLLAPSE_REPORT_CHARS = 50_000
+EXPANDED_SECTIONS = 2
+
+# Session state computed once per generated report and reused on every rerun
+REPORT_STATE_KEYS = ("report_content", "report_path", "report_bytes", "report_title", "report_tokens", "report_blocks", "nav_html")
+
+# LLM settings for each MR_MODEL choice
+LLM_CONFIGS = {
+    # Requires OPENAI_API_KEY in the .env file
+    "openai": {"model": "gpt-4o-mini", "temperature": 0.1},
+    # Requires GEMINI_API_KEY in the .env file
+    "gemini": {"model": "gemini/gemini-2.0-flash-exp", "temperature": 0.1},
+    # Requires ANTHROPIC_API_KEY in the .env file
+    "anthropic": {"model": "anthropic/claude-3-sonnet-20240229-v1:0", "temperature": 0.1},
+}
+
+
+@st.cache_resource(show_spinner=False)
+def load_llm(choice: str) -> LLM:
+    """Construct only the selected LLM, once per process"""
+    return LLM(**LLM_CONFIGS[choice])
+
+
+@st.cache_resource(show_spinner=False)
+def _get_crew(model_name: Optional[str], temperature: Optional[float], _llm_model: LLM) -> "MarketResearchCrew":
+    """Build the research crew once per model configuration and reuse it across queries"""
+    # Imported here so the search tools' import chain is only paid on first use
+    from market_research.crew_setup import MarketResearchCrew
+
+    # The leading underscore keeps the (unhashable) LLM out of the cache key;
+    # the model name and temperature identify it instead
+    return MarketResearchCrew(_llm_model)
+
+
+def get_crew(llm_model: LLM) -> "MarketResearchCrew":
+    """Return the shared research crew for the given LLM"""
+    return _get_crew(getattr(llm_model, "model", None), getattr(llm_model, "temperature", None), llm_model)
+
+
+def query_cache_key(search_query: str) -> str:
+    """Normalize a query so ones differing only in case, spacing or end punctuation share a cache entry"""
+    return " ".join(search_query.casefold().split()).rstrip(".?! ")
+
+
+# Streamlit ignores ttl on disk-persisted caches, so the current date is part of
+# the key instead and cached research expires at midnight
+@st.cache_data(persist="disk", show_spinner=False)
+def cached_research(query_key: str, version: str, model_name: Optional[str], day: str, _crew: "MarketResearchCrew",
+                    _search_query: str, _on_task_done: Optional[Callable] = None) -> str:
+    """Run the research crew, caching the report text on disk per normalized query, crew version, model and day"""
+    # The crew still sees the query as the user typed it
+    return str(_crew.run_research(_search_query, task_callback=_on_task_done))
+
+
+@st.cache_data(persist="disk", show_spinner=False)
+def cached_report_file(research_data: str, day: str) -> tuple[str, str, bytes]:
+    """Build the DOCX report once per distinct research text and day, returning its path, content and bytes"""
+    # The document stamps its generation and access dates, so day keeps a
+    # report built yesterday from being served today
+    report_path, report_content, saved = generate_report_file(research_data)
+    # The download button needs the file itself, so wait for the background save
+    saved.result()
+    # Keep the bytes rather than trusting the path: another report for the same
+    # company writes to the same filename
+    with open(report_path, "rb") as file:
+        return report_path, report_content, file.read()
+
+
+def reset_report_state():
+    """Drop the current report and everything derived from it"""
+    st.session_state.report_generated = False
+    for key in REPORT_STATE_KEYS:
+        st.session_state[key] = None
+
+
+def render_research_steps(steps: list, done: int):
+    """Show each research step as finished, running or pending"""
+    from market_research.crew_setup import RESEARCH_STEPS
+
+    for i, (step, label) in enumerate(zip(steps, RESEARCH_STEPS)):
+        if i < done:
+            step.markdown(f"✅ {label}")
+        elif i == done:
+            step.markdown(f"⏳ {label}...")
+        else:
+            step.markdown(f"▫️ {label}")
+
+
+def render_search_page(llm_model: LLM):
+    """Render the query form and generate a report when it is submitted"""
+    st.title("Market Research Report Generator")
+
+    # Main input with help tooltip
+    col1, col2 = st.columns([10, 1])
+    with col1:
+        st.write("Enter your research query about a company.")
+    with col2:
+        render_query_help()
+
+    # Input form
+    with st.form("search_form"):
+        search_query = st.text_area(
+            "Enter your research query",
+            height=100
+        )
+        submit_button = st.form_submit_button("Generate Report")
+
+    if submit_button and search_query:
+        try:
+            from market_research.crew_setup import RESEARCH_STEPS, crew_version
+
+            with st.status("Gathering information and generating report...") as status:
+                crew = get_crew(llm_model)
+                # One line per crew task, ticked off as the task finishes
+                steps = [st.empty() for _ in RESEARCH_STEPS]
+                completed = []
+                # Run the crew off the script thread so the status keeps updating
+                with ThreadPoolExecutor(
+                    max_workers=1, initializer=add_script_run_ctx, initargs=(None, get_script_run_ctx())
+                ) as executor:
+                    future = executor.submit(
+                        cached_research, query_cache_key(search_query), crew_version(),
+                        getattr(llm_model, "model", None), get_current_date(), crew, search_query,
+                        completed.append
+                    )
+                    started = time.monotonic()
+                    while not future.done():
+                        elapsed = int(time.monotonic() - started)
+                        render_research_steps(steps, len(completed))
+                        status.update(label=f"Gathering information... ({elapsed}s elapsed)")
+                        time.sleep(1)
+                    research_data = future.result()
+                # A cached result finishes without running any task
+                render_research_steps(steps, len(RESEARCH_STEPS))
+                status.update(label="Generating report...")
+                report_path, report_content, report_bytes = cached_report_file(research_data, get_current_date())
+                st.session_state.report_content = report_content
+                st.session_state.report_path = report_path
+                st.session_state.report_bytes = report_bytes
+                # Tokenize once; the navigation and the body are both built from these sections
+                st.session_state.report_tokens = tokenize_report(report_content)
+                st.session_state.nav_html = build_nav_html(st.session_state.report_tokens)
+                st.session_state.report_blocks = build_report_blocks(st.session_state.report_tokens)
+                st.session_state.search_query = search_query  # Store search query
+                # Plain string formatting, computed once here rather than on every rerun of the report view
+                st.session_state.report_title = generate_report_title(search_query)
+                st.session_state.report_generated = True
+                status.update(label="Report ready", state="complete")
+        except Exception as e:
+            st.error(f"An error occurred: {str(e)}")
+
+
+def render_section_anchor(section_id: str):
+    """Render the empty div the quick links jump to"""
+    st.markdown(f'<div id="{section_id}"></div>', unsafe_allow_html=True)
+
+
+def render_report_sections(sections: list, first_anchor: bool = True):
+    """Render report sections, each as its anchor followed by its markdown"""
+    for i, (section_id, markdown) in enumerate(sections):
+        # Only the anchor we built goes out as HTML; the section text comes from
+        # the LLM and scraped pages, so it is rendered as plain markdown
+        if i or first_anchor:
+            render_section_anchor(section_id)
+        st.markdown(markdown)
+
+
+def render_report_view():
+    """Render the generated report with its navigation and download button"""
+    # Navigation bar
+    col1, col2 = st.columns([6, 1])
+    with col1:
+        if st.button("← Back to research page", key="back_button"):
+            reset_report_state()
+            st.rerun()
+    with col2:
+        if st.session_state.report_bytes:
+            download_filename = f"Market Research Report of {st.session_state.report_title}.docx"
+            
+            st.download_button(
+                "Download Report",
+                data=st.session_state.report_bytes,
+                file_name=download_filename,
+                mime="application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+                key="download_button"
+            )
+    
+    # Main layout
+    col1, col2 = st.columns([1, 4])
+    plain_text = False
+
+    # Main content
+    with col2:
+        if st.session_state.report_content:
+            st.title("Generated Report")
+            
+            has_title = any(level == 1 for level, _, _, _ in st.session_state.report_tokens)
+            if has_title:
+                st.markdown(f"### {st.session_state.report_title}")
+            
+            # Markdown rendering of very large reports can stall the browser tab,
+            # so show them as plain text unless the user opts in
+            plain_text = (len(st.session_state.report_content) > LARGE_REPORT_CHARS
+                          and not st.toggle("Render as markdown (slower)", key="render_markdown"))
+            if plain_text:
+                st.caption("This report is large, so it is shown as plain text. "
+                           "The downloaded report keeps the full formatting.")
+                st.text(st.session_state.report_content)
+            else:
+                # Two elements per section (anchor and text) keep the frontend element
+                # count low; on long reports the later sections wait in expanders so the first
+                # render only lays out what is on screen
+                collapse = len(st.session_state.report_content) > COLLAPSE_REPORT_CHARS
+                for i, (title, sections) in enumerate(st.session_state.report_blocks):
+                    if collapse and i >= EXPANDED_SECTIONS:
+                        # Quick links target a block's first anchor, which stays
+                        # outside the expander so the jump lands on its header
+                        render_section_anchor(sections[0][0])
+                        with st.expander(title):
+                            render_report_sections(sections, first_anchor=False)
+                    else:
+                        render_report_sections(sections)
+
+    # Quick links in left column, filled in after the body because the plain
+    # text view has no section anchors for them to jump to
+    with col1:
+        if plain_text:
+            st.caption("Quick links are available when the report is rendered as markdown.")
+        else:
+            st.markdown(st.session_state.nav_html, unsafe_allow_html=True)
 
 
 def main(llm_model: LLM):
     setup_page_config()
     
     if 'report_generated' not in st.session_state:
-        st.session_state.report_generated = False
-        st.session_state.report_content = None
-        st.session_state.report_path = None
+        reset_report_state()
     
     if not st.session_state.report_generated:
-        st.title("Market Research Report Generator")
-        
-        # Main input with help tooltip
-        col1, col2 = st.columns([10, 1])
-        with col1:
-            st.write("Enter your research query about a company.")
-        with col2:
-            st.markdown("""
-                <style>
-                .tooltip {
-                    position: relative;
-                    display: inline-block;
-                }
-                .tooltip .tooltiptext {
-                    visibility: hidden;
-                    width: 300px;
-                    background-color: #f8f9fa;
-                    color: #333;
-                    text-align: left;
-                    border-radius: 6px;
-                    padding: 12px;
-                    position: absolute;
-                    z-index: 1;
-                    right: 105%;
-                    top: -10px;
-                    opacity: 0;
-                    transition: opacity 0.3s;
-                    box-shadow: 0 2px 4px rgba(0,0,0,0.1);
-                    border: 1px solid #e0e0e0;
-                }
-                .tooltip:hover .tooltiptext {
-                    visibility: visible;
-                    opacity: 1;
-                }
-                .help-icon {
-                    color: #666;
-                    cursor: help;
-                }
-                </style>
-                <div class="tooltip">
-                    <span class="help-icon">❔</span>
-                    <span class="tooltiptext">
-                        <strong>You can include:</strong><br>
-                        • Company name<br>
-                        • Industry or domain<br>
-                        • Specific aspects you're interested in<br><br>
-                        <strong>Sample queries:</strong><br>
-                        • "Overview of Delfi Diagnostics Early Cancer Detection"<br>
-                        • "Market analysis of Tesla in electric vehicles"<br>
-                        • "Moderna's COVID vaccine development and market position"
-                    </span>
-                </div>
-            """, unsafe_allow_html=True)
-
-        # Input form
-        with st.form("search_form"):
-            search_query = st.text_area(
-                "Enter your research query",
-                height=100
-            )
-            submit_button = st.form_submit_button("Generate Report")
-
-        if submit_button and search_query:
-            try:
-                with st.spinner("Gathering information and generating report..."):
-                    crew = MarketResearchCrew(llm_model)
-                    research_data = crew.run_research(search_query)
-                    report_path, report_content = generate_report_file(research_data)
-                    st.session_state.report_generated = True
-                    st.session_state.report_content = report_content
-                    st.session_state.report_path = report_path
-                    st.session_state.search_query = search_query  # Store search query
-                    st.rerun()
-            except Exception as e:
-                st.error(f"An error occurred: {str(e)}")
-    else:
-        # Navigation bar
-        col1, col2 = st.columns([6, 1])
-        with col1:
-            if st.button("← Back to research page", key="back_button"):
-                st.session_state.report_generated = False
-                st.rerun()
-        with col2:
-            if st.session_state.report_path:
-                query = st.session_state.get('search_query', '')
-                company_name = ' '.join(word.capitalize() for word in query.split()[:4])
-                report_title = generate_report_title(query)
-                download_filename = f"Market Research Report of {report_title}.docx"
-                
-                with open(st.session_state.report_path, "rb") as file:
-                    st.download_button(
-                        "Download Report",
-                        data=file,
-                        file_name=download_filename,
-                        mime="application/vnd.openxmlformats-officedocument.wordprocessingml.document",
-                        key="download_button"
-                    )
-        
-        # Main layout
-        col1, col2 = st.columns([1, 4])
-        
-        # Quick links in left column
-        with col1:
-            sections = []
-            for line in st.session_state.report_content.split('\n'):
-                if line.strip().startswith('## '):
-                    text = line.strip('#').strip()
-                    text = re.sub(r'^\d+\.\s*', '', text)
-                    if not text.lower().startswith(('comprehensive', 'market research', 'generated')):
-                        sections.append(text)
-            
-            for index, section in enumerate(sections, start=1):
-                section_id = create_section_id(section, index)
-                st.markdown(
-                    f'<a href="#{section_id}" '
-                    f'style="color: #333; text-decoration: none; display: block; padding: 5px 0; '
-                    f'transition: color 0.2s;" '
-                    f'onmouseover="this.style.color=\'#2E7D32\'" '
-                    f'onmouseout="this.style.color=\'#333\'">'
-                    f'{section}'
-                    f'</a>',
-                    unsafe_allow_html=True
-                )
-                    
-        # Main content
-        with col2:
-            if st.session_state.report_content:
-                st.title("Generated Report")
-                
-                lines = st.session_state.report_content.split('\n')
-                
-                report_name = next((line.strip('#').strip() for line in lines if line.strip().startswith('# ')), "")
-                if report_name:
-                    query = st.session_state.get('search_query', '')
-                    company_name = ' '.join(word.capitalize() for word in query.split()[:4])
-                    report_title = generate_report_title(query)
-                    st.markdown(f"### {report_title}")
-                else:
-                    report_title = company_name
-                
-                current_section = []
-                section_index = 1
-                for line in lines[1:]:
-                    if line.strip().startswith('#'):
-                        if current_section:
-                            content = '\n'.join(current_section)
-                            content = re.sub(r'^\d+\.\s*', '', content, flags=re.MULTILINE)
-                            section_id = create_section_id(current_section[0].strip('#').strip(), section_index)
-                            st.markdown(f'<div id="{section_id}"></div>', unsafe_allow_html=True)
-                            paragraphs = content.split('\n\n')
-                            for para in paragraphs:
-                                if para.strip():
-                                    st.markdown(para)
-                            st.markdown("---")
-                            current_section = []
-                            section_index += 1
-                    current_section.append(line)
-                
-                if current_section:
-                    content = '\n'.join(current_section)
-                    section_id = create_section_id(current_section[0].strip('#').strip(), section_index)
-                    st.markdown(f'<div id="{section_id}"></div>', unsafe_allow_html=True)
-                    st.markdown(content)
-                    st.markdown("---")
+        page = st.empty()
+        with page.container():
+            render_search_page(llm_model)
 
+        if not st.session_state.report_generated:
+            return
+        # Swap the search page for the report within this run rather than paying
+        # for a full st.rerun() of the script
+        page.empty()
 
-if __name__ == "__main__":
-
-    # Requires OPENAI_API_KEY in the .env file
-    openai_llm = LLM(
-        model="gpt-4o-mini",
-        temperature=0.1
-    )
+    render_report_view()
 
-    # Requires GEMINI_API_KEY in the .env file
-    gemini_llm = LLM(
-        model="gemini/gemini-2.0-flash-exp",
-        temperature=0.1
-    )
 
-    # Requires ANTHROPIC_API_KEY in the .env file
-    anthropic_llm = LLM(
-        model="anthropic/claude-3-sonnet-20240229-v1:0",
-        temperature=0.1
-    )
-
-    llm = openai_llm
+if __name__ == "__main__":
+    # Choose the provider with MR_MODEL (openai, gemini or anthropic)
+    model_choice = os.getenv("MR_MODEL", "openai")
+    if model_choice not in LLM_CONFIGS:
+        setup_page_config()
+        st.error(f"Unknown MR_MODEL \"{model_choice}\". Set it to one of: {', '.join(LLM_CONFIGS)}.")
+        st.stop()
+    llm = load_llm(model_choice)
 
     main(llm_model=llm)
@@ -1,72 +1,50 @@
 from crewai import Agent, Task, Crew, LLM
-from crewai_tools import SerpApiGoogleSearchTool, FirecrawlScrapeWebsiteTool
 import os
-from typing import List, Dict, Optional
+import queue
+import sys
+import hashlib
+import inspect
+from functools import lru_cache
+from typing import Callable, List, Dict, Optional
 
+# Progress labels for the crew's tasks, in the order create_tasks runs them
+RESEARCH_STEPS = (
+    "Searching for sources",
+    "Extracting source content",
+    "Analyzing findings and writing the report",
+)
 
-class MarketResearchCrew:
-    def __init__(self, llm_model: Optional[LLM] = None):
-        self.llm = llm_model
-        self.setup_tools()
-
-    def setup_tools(self):
-        # Setup Google Search Tool using built-in CrewAI tool
-        self.search_tool = SerpApiGoogleSearchTool()
-
-        # Setup Firecrawl Web Scraping Tool
-        self.scrape_tool = FirecrawlScrapeWebsiteTool(
-            api_key=os.getenv("FIRECRAWL_API_KEY"),
-            page_options={
-                "onlyMainContent": True,
-                "timeout": 30000,
-                "waitFor": 2000
-            }
-        )
-
-    def create_agents(self):
-        # Research Agent
-        researcher = Agent(
-            role='Market Research Analyst',
-            goal='Find relevant and high-quality articles about the company and its market',
-            backstory="""You are an experienced market research analyst with expertise in 
+# Role, goal and backstory for each agent built by create_agents
+AGENT_PROMPTS = {
+    "researcher": {
+        "role": "Market Research Analyst",
+        "goal": "Find relevant and high-quality articles about the company and its market",
+        "backstory": """You are an experienced market research analyst with expertise in 
             finding and analyzing company and industry information. Your strength lies in 
             identifying reliable sources and relevant content.""",
-            tools=[self.search_tool],
-            verbose=True,
-            llm=self.llm
-        )
-
-        # Content Scraper Agent
-        scraper = Agent(
-            role='Content Scraper',
-            goal='Extract and process content from identified sources',
-            backstory="""You are a specialist in web scraping and content processing. 
+    },
+    "scraper": {
+        "role": "Content Scraper",
+        "goal": "Extract and process content from identified sources",
+        "backstory": """You are a specialist in web scraping and content processing. 
             You know how to extract relevant information and format it properly using Firecrawl.
             You focus on getting clean, relevant content without HTML or unnecessary elements.""",
-            tools=[self.scrape_tool],
-            verbose=True,
-            llm=self.llm
-        )
-
-        # Analysis Agent
-        analyst = Agent(
-            role='Business Analyst',
-            goal='Analyze gathered information and generate comprehensive insights with proper citations',
-            backstory="""You are a seasoned business analyst with expertise in synthesizing 
+    },
+    "analyst": {
+        "role": "Business Analyst",
+        "goal": "Analyze gathered information and generate comprehensive insights with proper citations",
+        "backstory": """You are a seasoned business analyst with expertise in synthesizing 
             information and generating actionable insights. You excel at identifying key 
             trends, challenges, and opportunities. You are meticulous about citing sources 
             and providing proper attribution for all information. You ensure that every 
             significant claim or data point is backed by a source URL.""",
-            verbose=True,
-            llm=self.llm
-        )
-
-        return researcher, scraper, analyst
+    },
+}
 
-    def create_tasks(self, researcher, scraper, analyst, search_query):
-        # Task 1: Search for relevant articles
-        search_task = Task(
-            description=f"""Search for comprehensive articles and reliable sources about {search_query}.
+# Task descriptions and expected outputs; create_tasks fills in {search_query}
+TASK_PROMPTS = {
+    "search": {
+        "description": """Search for comprehensive articles and reliable sources about {search_query}.
             Focus on recent articles from reputable business and industry sources.
             
             Required source types (minimum 2-3 from each):
@@ -106,17 +84,16 @@ class MarketResearchCrew:
             - Diverse across categories
             - Relevant to the specific query
             
-            Identify at least 12-15 high-quality sources total.""",
-            agent=researcher,
-            expected_output="""A comprehensive list of relevant articles with their URLs and brief descriptions,
-            organized by category and focusing on company information, market position, and industry analysis."""
-        )
-
-        # Task 2: Scrape and process content
-        scrape_task = Task(
-            description="""Extract clean, formatted content from the provided URLs using Firecrawl.
+            Identify at least 12-15 high-quality sources total.
+            Run the searches for all categories in one call to the batch search tool rather than one at a time.""",
+        "expected_output": """A comprehensive list of relevant articles with their URLs and brief descriptions,
+            organized by category and focusing on company information, market position, and industry analysis.""",
+    },
+    "scrape": {
+        "description": """Extract clean, formatted content from the provided URLs using Firecrawl.
             Focus on relevant sections about company overview, products, market position,
             financial data, and future outlook. 
+            Scrape all the URLs in one call to the batch scrape tool rather than one at a time.
             
             For each source:
             1. Extract key data points and statistics
@@ -129,15 +106,11 @@ class MarketResearchCrew:
             - Remove HTML and unnecessary elements
             - Preserve important formatting
             - Maintain source attribution""",
-            agent=scraper,
-            expected_output="""Clean, structured markdown content from each source, organized by
+        "expected_output": """Clean, structured markdown content from each source, organized by
             key topics with proper attribution and formatting.""",
-            dependencies=[search_task]
-        )
-
-        # Task 3: Generate insights report
-        analysis_task = Task(
-            description="""Analyze the scraped content and generate a comprehensive market research report.
+    },
+    "analysis": {
+        "description": """Analyze the scraped content and generate a comprehensive market research report.
             
             Citation format:
             - Use inline citations: "Text [Source Name](URL)"
@@ -215,27 +188,139 @@ class MarketResearchCrew:
             - Include full source name and link
             - Remove access dates
             - Sort by relevance within categories""",
-            agent=analyst,
-            expected_output="""A comprehensive market research report in markdown format,
+        "expected_output": """A comprehensive market research report in markdown format,
             with proper formatting, citations, and clear structure.""",
+    },
+}
+
+class MarketResearchCrew:
+    def __init__(self, llm_model: Optional[LLM] = None):
+        self.llm = llm_model
+        self.setup_tools()
+        # Agent sets built so far and not in use. The crew object is shared across
+        # sessions, so each concurrent run takes its own set; sequential runs reuse one
+        self._agent_pool = queue.SimpleQueue()
+
+    def setup_tools(self):
+        # crewai_tools pulls in a large dependency tree, so it is imported here,
+        # when a crew is first built, rather than when this module is imported
+        from .tools import (
+            BatchScrapeWebsiteTool,
+            BatchSearchTool,
+            ResilientFirecrawlScrapeWebsiteTool,
+            ResilientSerpApiGoogleSearchTool,
+        )
+
+        # Setup Google Search Tool using built-in CrewAI tool, with rate limiting and retries
+        self.search_tool = ResilientSerpApiGoogleSearchTool()
+        # Runs the researcher's per-category queries concurrently
+        self.batch_search_tool = BatchSearchTool(search_tool=self.search_tool)
+
+        # Setup Firecrawl Web Scraping Tool, with rate limiting and retries
+        self.scrape_tool = ResilientFirecrawlScrapeWebsiteTool(
+            api_key=os.getenv("FIRECRAWL_API_KEY"),
+            page_options={
+                "onlyMainContent": True,
+                "timeout": 30000,
+                "waitFor": 2000
+            }
+        )
+
+        # Scrapes the researcher's whole URL list concurrently
+        self.batch_scrape_tool = BatchScrapeWebsiteTool(scrape_tool=self.scrape_tool)
+
+    def create_agents(self):
+        # Research Agent
+        researcher = Agent(
+            **AGENT_PROMPTS["researcher"],
+            tools=[self.batch_search_tool, self.search_tool],
+            verbose=True,
+            llm=self.llm
+        )
+
+        # Content Scraper Agent
+        scraper = Agent(
+            **AGENT_PROMPTS["scraper"],
+            tools=[self.batch_scrape_tool, self.scrape_tool],
+            verbose=True,
+            llm=self.llm
+        )
+
+        # Analysis Agent
+        analyst = Agent(
+            **AGENT_PROMPTS["analyst"],
+            verbose=True,
+            llm=self.llm
+        )
+
+        return researcher, scraper, analyst
+
+    def create_tasks(self, researcher, scraper, analyst, search_query):
+        # Task 1: Search for relevant articles
+        search_task = Task(
+            description=TASK_PROMPTS["search"]["description"].format(search_query=search_query),
+            agent=researcher,
+            expected_output=TASK_PROMPTS["search"]["expected_output"]
+        )
+
+        # Task 2: Scrape and process content
+        scrape_task = Task(
+            description=TASK_PROMPTS["scrape"]["description"],
+            agent=scraper,
+            expected_output=TASK_PROMPTS["scrape"]["expected_output"],
+            dependencies=[search_task]
+        )
+
+        # Task 3: Generate insights report
+        analysis_task = Task(
+            description=TASK_PROMPTS["analysis"]["description"],
+            agent=analyst,
+            expected_output=TASK_PROMPTS["analysis"]["expected_output"],
             dependencies=[scrape_task]
         )
 
         return [search_task, scrape_task, analysis_task]
 
-    def run_research(self, search_query):
-        # Create agents
-        researcher, scraper, analyst = self.create_agents()
-        
-        # Create tasks
-        tasks = self.create_tasks(researcher, scraper, analyst, search_query)
-        
-        # Create and run the crew
-        crew = Crew(
-            agents=[researcher, scraper, analyst],
-            tasks=tasks,
-            verbose=True
-        )
-        
-        result = crew.kickoff()
-        return result 
\ No newline at end of file
+    def acquire_agents(self):
+        """Take an idle agent set from the pool, building one if every set is in use"""
+        try:
+            return self._agent_pool.get_nowait()
+        except queue.Empty:
+            return self.create_agents()
+
+    def release_agents(self, agents):
+        """Return an agent set to the pool for the next run"""
+        self._agent_pool.put(agents)
+
+    def run_research(self, search_query, task_callback: Optional[Callable] = None):
+        # Reuse agents from an earlier run when one is idle
+        agents = self.acquire_agents()
+        researcher, scraper, analyst = agents
+        try:
+            # Create tasks
+            tasks = self.create_tasks(researcher, scraper, analyst, search_query)
+
+            # Create and run the crew
+            crew = Crew(
+                agents=[researcher, scraper, analyst],
+                tasks=tasks,
+                verbose=True,
+                # Called with each task's output as it finishes, so callers can report progress
+                task_callback=task_callback
+            )
+
+            result = crew.kickoff()
+            return result
+        finally:
+            self.release_agents(agents)
+
+
+@lru_cache(maxsize=1)
+def crew_version():
+    """Fingerprint of the crew's agents, prompts and tool config, used to invalidate cached research"""
+    # Hash the whole module so edits to the prompt constants count as well as the
+    # class, plus the agents' tools module, read as text so it is not imported here
+    digest = hashlib.sha256(inspect.getsource(sys.modules[__name__]).encode())
+    with open(os.path.join(os.path.dirname(__file__), 'tools.py'), 'rb') as file:
+        digest.update(file.read())
+    return digest.hexdigest()[:16]
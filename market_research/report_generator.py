@@ -1,46 +1,78 @@
 import os
-from docx import Document
-from docx.shared import Inches, Pt, RGBColor
-from docx.enum.text import WD_ALIGN_PARAGRAPH, WD_LINE_SPACING
-from docx.enum.style import WD_STYLE_TYPE
+import hashlib
+import io
+import json
+import threading
 import re
+from concurrent.futures import Future, ThreadPoolExecutor
 from datetime import datetime
+from functools import lru_cache
 from urllib.parse import urlparse
 
+# A line of text (blank lines between them are skipped)
+_LINE = re.compile(r'[^\n]+')
+# Markdown heading: leading '#' run (the level), then the text, minus any closing '#' run
+_HEADING = re.compile(r'^(#+)\s*(.*?)(?:\s+#+)?\s*$')
+# Up to two words after the first 'of'/'for'/'about' on a line that mentions
+# an overview, analysis or report
+_NAME_AFTER_KEYWORD = re.compile(
+    r'^(?=.*(?:overview|analysis|report))#*[^\S\n]*(?:.*?[^\S\n])??(?:of|for|about)(?=[^\S\n]|#*$)'
+    r'(?:[^\S\n]+(\S+(?:[^\S\n]+\S+)?))?',
+    re.IGNORECASE | re.MULTILINE
+)
+# First two words of the first non-blank line that is not a header
+_FIRST_WORDS = re.compile(r'^(?!#)[^\S\n]*(\S+(?:[^\S\n]+\S+)?)', re.MULTILINE)
+# Drops the characters not allowed in file names on common operating systems
+_INVALID_FN_TABLE = str.maketrans('', '', '<>:"/\\|?*')
+# Markdown link: [text](url)
+_MD_LINK_RE = re.compile(r'\[([^\]]+)\]\(([^)]+)\)')
+# Raw URL citation: (source: https://...)
+_CITATION_RE = re.compile(r'\(source: (https?://[^\s)]+)\)')
+
+# Generated reports are saved here, relative to the working directory
+_REPORTS_DIR = 'reports'
+# Maps a content key to the report file generated from that content
+_REPORT_INDEX = os.path.join(_REPORTS_DIR, '.index.json')
+_report_index_lock = threading.Lock()
+# Documents are serialized and written off the caller's thread
+_SAVE_POOL = ThreadPoolExecutor(max_workers=2, thread_name_prefix='report-save')
+
 
 def extract_company_name(content):
     """Extract company name from the report content"""
     # Try to find company name in the first few lines
-    first_lines = content.split('\n')[:10]
-    for line in first_lines:
-        # Look for company name in headers or first paragraph
-        if any(word in line.lower() for word in ['overview', 'analysis', 'report']):
-            # Extract potential company name
-            words = line.strip('#').strip().split()
-            for i, word in enumerate(words):
-                if word.lower() in ['of', 'for', 'about']:
-                    return ' '.join(words[i+1:i+3])  # Take next 2 words after 'of/for/about'
+    head = '\n'.join(content.split('\n', 10)[:10])
+    # Look for company name in headers or first paragraph:
+    # take the 2 words after 'of/for/about'
+    match = _NAME_AFTER_KEYWORD.search(head)
+    if match:
+        name = match.group(1) or ''
+        if head.startswith('\n', match.end()) or match.end() == len(head):
+            # A closing '#' run at the end of the header line is not part of the name
+            name = name.rstrip('#')
+        return ' '.join(name.split())
     
     # Fallback to first meaningful words
-    for line in first_lines:
-        if line.strip() and not line.startswith('#'):
-            words = line.strip().split()
-            return ' '.join(words[:2])  # Take first two words
+    match = _FIRST_WORDS.search(head)
+    if match:
+        return ' '.join(match.group(1).split())
     
     return "Company"  # Default fallback
 
 
 def sanitize_filename(filename):
     """Sanitize the filename to be safe for all operating systems"""
-    # Remove or replace invalid characters
-    filename = re.sub(r'[<>:"/\\|?*]', '', filename)
-    # Remove multiple spaces
-    filename = ' '.join(filename.split())
-    return filename.strip()
+    # Remove invalid characters, then collapse runs of whitespace (which
+    # also trims both ends)
+    return ' '.join(filename.translate(_INVALID_FN_TABLE).split())
 
 
 def setup_document_styles(doc):
-    """Set up document styles for consistent formatting"""
+    """Set up document styles for consistent formatting, returning the body styles' ids by name"""
+    from docx.shared import Inches, Pt, RGBColor
+    from docx.enum.text import WD_LINE_SPACING
+    from docx.enum.style import WD_STYLE_TYPE
+
     # Normal text style
     style = doc.styles['Normal']
     style.font.name = 'Calibri'
@@ -71,55 +103,78 @@ def setup_document_styles(doc):
     quote_style.paragraph_format.space_before = Pt(12)
     quote_style.paragraph_format.space_after = Pt(12)
 
+    # Resolve every style the body can use once
+    style_ids = {f'Heading {level}': doc.styles[f'Heading {level}'].style_id for level in range(1, 10)}
+    style_ids['Quote'] = quote_style.style_id
+    for name in ('List Bullet', 'List Number'):
+        style_ids[name] = doc.styles[name].style_id
+    return style_ids
+
 
 def extract_markdown_links(content):
     """Extract markdown-style links with their context"""
     links = []
-    # Match markdown links [text](url)
-    pattern = r'\[([^\]]+)\]\(([^)]+)\)'
-    
-    lines = content.split('\n')
     current_section = "General"
     
-    for i, line in enumerate(lines):
+    for line in content.split('\n'):
         if line.strip().startswith('#'):
             current_section = line.strip('#').strip()
-        
-        matches = re.finditer(pattern, line)
-        for match in matches:
-            text, url = match.groups()
-            context = line.strip()
-            
-            # Categorize the source
-            category = categorize_source(text, url)
-            
-            links.append({
-                'text': text,
-                'url': url,
-                'context': context,
-                'section': current_section,
-                'category': category
-            })
+        links.extend(_line_links(line, current_section))
     
     return links
 
 
+def _line_links(line, section):
+    """Build the link records for every markdown link on one line"""
+    links = []
+    for match in _MD_LINK_RE.finditer(line):
+        text, url = match.groups()
+        context = line.strip()
+        
+        # Categorize the source
+        category = categorize_source(text, url)
+        
+        links.append({
+            'text': text,
+            'url': url,
+            'context': context,
+            'section': section,
+            'category': category
+        })
+    return links
+
+
+# Keywords that place a source in each category, checked in this order
+_SOURCE_CATEGORIES = {
+    'Market Research': ['research', 'market analysis', 'forecast', 'report', 'grandview', 'frost', 'marketsandmarkets'],
+    'Scientific Publications': ['nature', 'science', 'cell', 'lancet', 'journal', 'pubmed', 'nih.gov', 'research paper'],
+    'Regulatory & Government': ['fda', 'ema', 'gov', 'regulation', 'guidance', 'guidelines'],
+    'Industry News': ['news', 'press', 'article', 'forbes', 'reuters', 'bloomberg'],
+    'Company Resources': ['company', 'corporate', 'investor', 'presentation', 'annual report'],
+    'Healthcare Organizations': ['hospital', 'clinic', 'medical center', 'health', 'care', 'who.int']
+}
+# One alternation per category, so each check is a single scan in the regex
+# engine while the first listed category still wins
+_CATEGORY_PATTERNS = [
+    (category, re.compile('|'.join(map(re.escape, keywords))))
+    for category, keywords in _SOURCE_CATEGORIES.items()
+]
+
+
+@lru_cache(maxsize=1024)
+def _netloc(url):
+    """Lower-cased host part of a URL"""
+    return urlparse(url).netloc.lower()
+
+
+@lru_cache(maxsize=2048)
 def categorize_source(text, url):
     """Categorize the source based on text and URL"""
     text_lower = text.lower()
-    domain = urlparse(url).netloc.lower()
-    
-    categories = {
-        'Market Research': ['research', 'market analysis', 'forecast', 'report', 'grandview', 'frost', 'marketsandmarkets'],
-        'Scientific Publications': ['nature', 'science', 'cell', 'lancet', 'journal', 'pubmed', 'nih.gov', 'research paper'],
-        'Regulatory & Government': ['fda', 'ema', 'gov', 'regulation', 'guidance', 'guidelines'],
-        'Industry News': ['news', 'press', 'article', 'forbes', 'reuters', 'bloomberg'],
-        'Company Resources': ['company', 'corporate', 'investor', 'presentation', 'annual report'],
-        'Healthcare Organizations': ['hospital', 'clinic', 'medical center', 'health', 'care', 'who.int']
-    }
+    domain = _netloc(url)
     
-    for category, keywords in categories.items():
-        if any(keyword in text_lower or keyword in domain for keyword in keywords):
+    for category, pattern in _CATEGORY_PATTERNS:
+        if pattern.search(text_lower) or pattern.search(domain):
             return category
     
     return "Other Sources"
@@ -140,16 +195,20 @@ def format_sources_section(doc, links):
             categories[category] = []
         categories[category].append(link)
     
+    # Every source is stamped with the same access date
+    today = get_current_date()
+    
     # Add sources by category
     for category, category_links in categories.items():
         doc.add_heading(category, 2)
         for link in category_links:
             p = doc.add_paragraph(style='List Bullet')
             p.add_run(f"{link['text']}").bold = True
-            p.add_run(f" (Accessed: {get_current_date()})")
-            p.add_run(f"\nURL: {link['url']}")
+            # Everything after the title shares one run, since it is all plain text
+            details = f" (Accessed: {today})\nURL: {link['url']}"
             if link['context'] != link['text']:
-                p.add_run(f"\nContext: {link['context']}")
+                details += f"\nContext: {link['context']}"
+            p.add_run(details)
 
 
 def get_current_date():
@@ -160,23 +219,129 @@ def get_current_date():
 def process_inline_citations(content):
     """Process inline citations to use markdown-style links"""
     # Replace raw URL citations with markdown-style links
-    pattern = r'\(source: (http[s]?://(?:[a-zA-Z]|[0-9]|[$-_@.&+]|[!*\\(\\),]|(?:%[0-9a-fA-F][0-9a-fA-F]))+)\)'
-    return re.sub(pattern, r'([source](\1))', content)
+    return _CITATION_RE.sub(r'([source](\1))', content)
+
+
+def _iter_blocks(content):
+    """Yield a (raw line, style name, text) triple for each non-blank line of markdown, without splitting the whole content"""
+    for match in _LINE.finditer(content):
+        raw = match.group()
+        line = raw.strip()
+        if not line:
+            continue
+        heading = _HEADING.match(line)
+        if heading:
+            yield raw, f'Heading {min(len(heading.group(1)), 9)}', heading.group(2)
+        # Remove only the leading markers; stripping their characters from both
+        # ends also ate trailing '-', '*', '1', '.' and '>' and leading '**' emphasis
+        elif line.startswith('>'):
+            yield raw, 'Quote', line.lstrip('> ')
+        elif line.startswith(('- ', '* ')):
+            yield raw, 'List Bullet', line[2:].strip()
+        elif line.startswith('1. '):
+            yield raw, 'List Number', line[3:].strip()
+        else:
+            yield raw, 'Normal', line
+
+
+def _append_paragraph(body, text, style_id=None):
+    """Append a paragraph with a single run of text to the document body's XML"""
+    p = body.add_p()
+    if style_id:
+        p.style = style_id
+    if text:
+        p.add_r().text = text
+
+
+def _content_key(content):
+    """Key identifying a report by its content and the date stamped into the document"""
+    return hashlib.blake2b(f"{get_current_date()}\n{content}".encode(), digest_size=16).hexdigest()
+
+
+def _load_report_index():
+    """Read the content-key -> report path index, treating a missing or corrupt file as empty"""
+    try:
+        with open(_REPORT_INDEX, encoding='utf-8') as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_report_index(index):
+    """Write the report index atomically so a concurrent reader never sees a partial file"""
+    tmp_path = f"{_REPORT_INDEX}.{threading.get_ident()}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as file:
+        json.dump(index, file)
+    os.replace(tmp_path, _REPORT_INDEX)
+
+
+def _save_report(doc, report_path, key):
+    """Write the document to report_path and record it in the report index"""
+    # Zip the document in memory so the file gets one large write instead of
+    # the zip writer's many small ones
+    buffer = io.BytesIO()
+    doc.save(buffer)
+    
+    # Write to a temporary file first so a reader of report_path never sees a half-written report
+    tmp_path = f"{report_path}.{threading.get_ident()}.tmp"
+    with open(tmp_path, 'wb') as file:
+        file.write(buffer.getbuffer())
+    os.replace(tmp_path, report_path)
+    
+    # Reports for the same company share a filename, so drop whatever content
+    # the index had recorded for this path before pointing it at the new one
+    with _report_index_lock:
+        index = {k: path for k, path in _load_report_index().items() if path != report_path}
+        index[key] = report_path
+        _save_report_index(index)
+    
+    return report_path
+
+
+def _report_filename(company_name, suffix=None):
+    """File name for a report about company_name, with an optional suffix telling it apart from others"""
+    if suffix:
+        company_name = f"{company_name} {suffix}"
+    return sanitize_filename(f"Market Analysis of {company_name}.docx")
 
 
 def generate_report_file(research_data):
-    """Generate a formatted Word document from the research data"""
-    doc = Document()
-    setup_document_styles(doc)
-    
+    """Generate a formatted Word document from the research data.
+
+    Returns the report path, the processed content and a future that
+    completes once the file has been written.
+    """
     # Convert CrewAI output to string if it's not already
     content = str(research_data)
     
     # Process inline citations
     content = process_inline_citations(content)
     
-    # Extract markdown links before processing content
-    links = extract_markdown_links(content)
+    return _build_report(content, _report_filename(extract_company_name(content)))
+
+
+def _build_report(content, filename):
+    """Build the document for already processed content and save it under filename in the reports directory"""
+    # python-docx is only imported once a document actually has to be built,
+    # so importing this module (e.g. for generate_report_title) stays cheap
+    from docx import Document
+    from docx.enum.text import WD_ALIGN_PARAGRAPH
+
+    report_path = os.path.join(_REPORTS_DIR, filename)
+    
+    # Reuse the document already generated from this content under this name
+    # today. The name is part of the key, so a batch's suffixed copy and a
+    # plain single report of the same content are tracked separately
+    key = _content_key(f"{filename}\n{content}")
+    with _report_index_lock:
+        cached_path = _load_report_index().get(key)
+    if cached_path and os.path.exists(cached_path):
+        saved = Future()
+        saved.set_result(cached_path)
+        return cached_path, content, saved
+    
+    doc = Document()
+    style_ids = setup_document_styles(doc)
     
     # Title
     title = doc.add_heading('Market Research Report', 0)
@@ -187,177 +352,136 @@ def generate_report_file(research_data):
     date_paragraph.alignment = WD_ALIGN_PARAGRAPH.CENTER
     date_paragraph.add_run(f"Generated on {get_current_date()}")
     
-    # Process content sections
-    sections = []
-    current_section = []
-    
-    for line in content.split('\n'):
-        if line.strip().startswith('#'):
-            if current_section:
-                sections.append('\n'.join(current_section))
-                current_section = []
-        current_section.append(line.strip())
-    
-    if current_section:
-        sections.append('\n'.join(current_section))
-    
-    # Process each section
-    for section in sections:
-        if section.strip():
-            lines = section.split('\n')
-            for line in lines:
-                if line.strip().startswith('#'):
-                    level = min(line.count('#'), 9)
-                    text = line.replace('#', '').strip()
-                    doc.add_heading(text, level)
-                elif line.strip().startswith('>'):
-                    text = line.strip('> ').strip()
-                    p = doc.add_paragraph(text, style='Quote')
-                elif line.strip().startswith('- ') or line.strip().startswith('* '):
-                    text = line.strip('- ').strip('* ').strip()
-                    p = doc.add_paragraph(text)
-                    p.style = 'List Bullet'
-                elif line.strip().startswith('1. '):
-                    text = line.strip('1. ').strip()
-                    p = doc.add_paragraph(text)
-                    p.style = 'List Number'
-                else:
-                    if line.strip():
-                        doc.add_paragraph(line.strip())
+    # Process content line by line, appending paragraphs straight to the body
+    # XML instead of going through python-docx's per-paragraph proxies and
+    # style-name lookups. The same pass collects the markdown links for the
+    # sources section
+    body = doc.element.body
+    links = []
+    current_section = "General"
+    for line, style, text in _iter_blocks(content):
+        if style.startswith('Heading'):
+            current_section = line.strip('#').strip()
+        links.extend(_line_links(line, current_section))
+        _append_paragraph(body, text, style_ids.get(style))
     
     # Add sources section with categorized links
     format_sources_section(doc, links)
     
     # Save the document
-    if not os.path.exists('reports'):
-        os.makedirs('reports')
+    os.makedirs(_REPORTS_DIR, exist_ok=True)
     
-    company_name = extract_company_name(content)
-    filename = sanitize_filename(f"Market Analysis of {company_name}.docx")
-    report_path = os.path.join('reports', filename)
+    # To save file automatically, in the background; callers that need the
+    # file wait on the returned future
+    saved = _SAVE_POOL.submit(_save_report, doc, report_path, key)
     
-    # To save file automatically
-    doc.save(report_path)
-    
-    return report_path, content
+    return report_path, content, saved
+
+
+def generate_report_files(research_data_list):
+    """Generate a Word document for each research result concurrently, in input order"""
+    # Threads are enough: the documents share no state, and zlib releases the
+    # GIL while the saves compress
+    if not research_data_list:
+        return []
+    
+    # Different reports that would save to the same file name (same company,
+    # or the same fallback words) each get a content suffix instead, so none
+    # overwrites another
+    contents = [process_inline_citations(str(research_data)) for research_data in research_data_list]
+    companies = [extract_company_name(content) for content in contents]
+    filenames = [_report_filename(company_name) for company_name in companies]
+    contents_by_name = {}
+    for content, filename in zip(contents, filenames):
+        contents_by_name.setdefault(filename, set()).add(content)
+    filenames = [
+        _report_filename(company_name, _content_key(content)[:8]) if len(contents_by_name[filename]) > 1 else filename
+        for content, company_name, filename in zip(contents, companies, filenames)
+    ]
+    
+    with ThreadPoolExecutor(max_workers=min(8, len(research_data_list))) as executor:
+        reports = list(executor.map(_build_report, contents, filenames))
+    # Hand back reports whose files are all on disk
+    for _, _, saved in reports:
+        saved.result()
+    return reports
+
+
+# Sections of a generated report: each top-level heading with the
+# (sub-heading, research_data key) pairs filled in under it
+_REPORT_SCHEMA = (
+    ("Executive Summary", (
+        ("Key Findings", 'key_findings'),
+        ("Market Highlights", 'market_highlights'),
+        ("Strategic Recommendations", 'strategic_recommendations'),
+    )),
+    ("Company Overview", (
+        ("Company History and Background", 'company_history'),
+        ("Mission and Vision", 'mission_vision'),
+        ("Key Leadership and Organizational Structure", 'leadership'),
+    )),
+    ("Product/Service Analysis", (
+        ("Core Offerings", 'core_offerings'),
+        ("Key Features and Benefits", 'key_features'),
+        ("Technology and Innovation", 'technology'),
+        ("Product Development Pipeline", 'development_pipeline'),
+    )),
+    ("Market Analysis", (
+        ("Industry Overview and Size", 'industry_overview'),
+        ("Market Trends and Dynamics", 'market_trends'),
+        ("Growth Drivers and Barriers", 'growth_drivers'),
+        ("Competitive Landscape", 'competitive_landscape'),
+    )),
+    ("Business Strategy", (
+        ("Go-to-Market Strategy", 'go_to_market'),
+        ("Revenue Model", 'revenue_model'),
+        ("Strategic Partnerships", 'partnerships'),
+        ("Geographic Presence", 'geographic_presence'),
+    )),
+    ("Financial Analysis", (
+        ("Revenue and Growth Metrics", 'revenue_metrics'),
+        ("Funding and Investments", 'funding'),
+        ("Key Financial Indicators", 'financial_indicators'),
+        ("Future Projections", 'projections'),
+    )),
+    ("SWOT Analysis", (
+        ("Strengths", 'strengths'),
+        ("Weaknesses", 'weaknesses'),
+        ("Opportunities", 'opportunities'),
+        ("Threats", 'threats'),
+    )),
+    ("Future Outlook", (
+        ("Growth Opportunities", 'growth_opportunities'),
+        ("Potential Challenges", 'challenges'),
+        ("Industry Predictions", 'predictions'),
+        ("Strategic Recommendations", 'future_recommendations'),
+    )),
+    ("Conclusion", (
+        ("Key Takeaways", 'key_takeaways'),
+        ("Strategic Implications", 'implications'),
+        ("Final Recommendations", 'final_recommendations'),
+    )),
+)
 
 
 def generate_report_content(research_data):
     """Generate comprehensive report content from research data"""
-    content = []
-    
     # Title
-    content.append(f"# Comprehensive Market Research Report: {research_data['title']}\n")
-    
-    # Executive Summary
-    content.append("## Executive Summary")
-    content.append("### Key Findings")
-    content.append(research_data.get('key_findings', ''))
-    content.append("\n### Market Highlights")
-    content.append(research_data.get('market_highlights', ''))
-    content.append("\n### Strategic Recommendations")
-    content.append(research_data.get('strategic_recommendations', ''))
-    content.append("\n")
-    
-    # Company Overview
-    content.append("## Company Overview")
-    content.append("### Company History and Background")
-    content.append(research_data.get('company_history', ''))
-    content.append("\n### Mission and Vision")
-    content.append(research_data.get('mission_vision', ''))
-    content.append("\n### Key Leadership and Organizational Structure")
-    content.append(research_data.get('leadership', ''))
-    content.append("\n")
-    
-    # Product/Service Analysis
-    content.append("## Product/Service Analysis")
-    content.append("### Core Offerings")
-    content.append(research_data.get('core_offerings', ''))
-    content.append("\n### Key Features and Benefits")
-    content.append(research_data.get('key_features', ''))
-    content.append("\n### Technology and Innovation")
-    content.append(research_data.get('technology', ''))
-    content.append("\n### Product Development Pipeline")
-    content.append(research_data.get('development_pipeline', ''))
-    content.append("\n")
-    
-    # Market Analysis
-    content.append("## Market Analysis")
-    content.append("### Industry Overview and Size")
-    content.append(research_data.get('industry_overview', ''))
-    content.append("\n### Market Trends and Dynamics")
-    content.append(research_data.get('market_trends', ''))
-    content.append("\n### Growth Drivers and Barriers")
-    content.append(research_data.get('growth_drivers', ''))
-    content.append("\n### Competitive Landscape")
-    content.append(research_data.get('competitive_landscape', ''))
-    content.append("\n")
-    
-    # Business Strategy
-    content.append("## Business Strategy")
-    content.append("### Go-to-Market Strategy")
-    content.append(research_data.get('go_to_market', ''))
-    content.append("\n### Revenue Model")
-    content.append(research_data.get('revenue_model', ''))
-    content.append("\n### Strategic Partnerships")
-    content.append(research_data.get('partnerships', ''))
-    content.append("\n### Geographic Presence")
-    content.append(research_data.get('geographic_presence', ''))
-    content.append("\n")
-    
-    # Financial Analysis
-    content.append("## Financial Analysis")
-    content.append("### Revenue and Growth Metrics")
-    content.append(research_data.get('revenue_metrics', ''))
-    content.append("\n### Funding and Investments")
-    content.append(research_data.get('funding', ''))
-    content.append("\n### Key Financial Indicators")
-    content.append(research_data.get('financial_indicators', ''))
-    content.append("\n### Future Projections")
-    content.append(research_data.get('projections', ''))
-    content.append("\n")
-    
-    # SWOT Analysis
-    content.append("## SWOT Analysis")
-    content.append("### Strengths")
-    content.append(research_data.get('strengths', ''))
-    content.append("\n### Weaknesses")
-    content.append(research_data.get('weaknesses', ''))
-    content.append("\n### Opportunities")
-    content.append(research_data.get('opportunities', ''))
-    content.append("\n### Threats")
-    content.append(research_data.get('threats', ''))
-    content.append("\n")
-    
-    # Future Outlook
-    content.append("## Future Outlook")
-    content.append("### Growth Opportunities")
-    content.append(research_data.get('growth_opportunities', ''))
-    content.append("\n### Potential Challenges")
-    content.append(research_data.get('challenges', ''))
-    content.append("\n### Industry Predictions")
-    content.append(research_data.get('predictions', ''))
-    content.append("\n### Strategic Recommendations")
-    content.append(research_data.get('future_recommendations', ''))
-    content.append("\n")
+    content = [f"# Comprehensive Market Research Report: {research_data['title']}\n"]
     
-    # Conclusion
-    content.append("## Conclusion")
-    content.append("### Key Takeaways")
-    content.append(research_data.get('key_takeaways', ''))
-    content.append("\n### Strategic Implications")
-    content.append(research_data.get('implications', ''))
-    content.append("\n### Final Recommendations")
-    content.append(research_data.get('final_recommendations', ''))
-    content.append("\n")
+    # One block per section, with a blank line between its sub-sections
+    for heading, fields in _REPORT_SCHEMA:
+        content.append(f"## {heading}")
+        content.append('\n\n'.join(
+            f"### {subheading}\n{research_data.get(key, '')}" for subheading, key in fields
+        ))
+        content.append("\n")
     
     # Sources
     content.append("## Sources")
-    if research_data.get('sources'):
-        for source in research_data['sources']:
-            content.append(f"[{source['title']}]({source['url']})")
+    content.extend(f"[{source['title']}]({source['url']})" for source in research_data.get('sources') or ())
     
-    return '\n'.join(content) 
+    return '\n'.join(content)
 
 
 def generate_report_title(query):
@@ -0,0 +1,233 @@
+import hashlib
+import json
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import wraps
+from typing import Any, Callable, List, Optional, Type
+from crewai.tools import BaseTool
+from crewai_tools import SerpApiGoogleSearchTool, FirecrawlScrapeWebsiteTool
+from pydantic import BaseModel, Field
+
+# HTTP statuses worth retrying: timeouts, rate limits and transient server errors
+RETRY_STATUSES = {408, 429, 500, 502, 503, 504}
+MAX_ATTEMPTS = 4
+MAX_RETRY_DELAY = 20.0
+
+
+class RateLimiter:
+    """Token bucket allowing `rate` calls per `per` seconds, shared across threads"""
+
+    def __init__(self, rate: float, per: float = 1.0):
+        self.rate = rate
+        self.per = per
+        self._tokens = rate
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Block until a call is allowed"""
+        with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.rate, self._tokens + (now - self._updated) * self.rate / self.per)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                time.sleep((1 - self._tokens) * self.per / self.rate)
+
+
+# One bucket per API, shared by every tool instance and agent thread
+SEARCH_LIMITER = RateLimiter(rate=5, per=1.0)
+SCRAPE_LIMITER = RateLimiter(rate=5, per=1.0)
+
+
+class ResultCache:
+    """Tool results kept as JSON files in a directory, each expiring `ttl` seconds after it was saved"""
+
+    def __init__(self, directory: str, ttl: float):
+        self.directory = directory
+        self.ttl = ttl
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, hashlib.blake2b(key.encode(), digest_size=16).hexdigest() + '.json')
+
+    def get(self, key: str) -> Any:
+        """Return the cached value for key, or None when missing or expired"""
+        try:
+            with open(self._path(key), encoding='utf-8') as file:
+                entry = json.load(file)
+        except (OSError, ValueError):
+            return None
+        if time.time() - entry['saved'] > self.ttl:
+            return None
+        return entry['value']
+
+    def set(self, key: str, value: Any):
+        """Store a JSON-serializable value, replacing the file atomically"""
+        os.makedirs(self.directory, exist_ok=True)
+        path = self._path(key)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as file:
+            json.dump({'saved': time.time(), 'value': value}, file)
+        os.replace(tmp_path, path)
+
+
+# Search and scrape results are reused across reports for a week; delete
+# .cache/ to start fresh
+CACHE_TTL = 7 * 24 * 60 * 60
+SEARCH_CACHE = ResultCache(os.path.join('.cache', 'serpapi'), CACHE_TTL)
+SCRAPE_CACHE = ResultCache(os.path.join('.cache', 'firecrawl'), CACHE_TTL)
+
+
+def _status_code(error: Exception) -> Optional[int]:
+    """HTTP status carried by an API client error, if any"""
+    status = getattr(error, 'status_code', None)
+    if status is None:
+        status = getattr(getattr(error, 'response', None), 'status_code', None)
+    return status
+
+
+def _is_transient(error: Exception) -> bool:
+    """Whether a failed call is worth retrying"""
+    status = _status_code(error)
+    if status is not None:
+        return status in RETRY_STATUSES
+    # Connection errors and timeouts (requests' exceptions are OSErrors too)
+    return isinstance(error, OSError)
+
+
+def _retry_delay(error: Exception, attempt: int) -> float:
+    """Seconds to wait before the next attempt, honouring Retry-After when the server sends it"""
+    headers = getattr(getattr(error, 'response', None), 'headers', None) or {}
+    retry_after = headers.get('Retry-After')
+    if retry_after and retry_after.isdigit():
+        return min(float(retry_after), MAX_RETRY_DELAY)
+    # Exponential backoff with full jitter so parallel callers don't retry in lockstep
+    return random.uniform(0, min(MAX_RETRY_DELAY, 0.5 * 2 ** attempt))
+
+
+def with_retries(func: Callable, limiter: RateLimiter) -> Callable:
+    """Wrap an API call so it is rate limited and retried with backoff on transient failures"""
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        for attempt in range(MAX_ATTEMPTS):
+            limiter.acquire()
+            try:
+                return func(*args, **kwargs)
+            except Exception as e:
+                if attempt == MAX_ATTEMPTS - 1 or not _is_transient(e):
+                    raise
+                time.sleep(_retry_delay(e, attempt))
+    return wrapper
+
+
+class ResilientSerpApiGoogleSearchTool(SerpApiGoogleSearchTool):
+    """Google search that rate limits and retries SerpApi calls, and reports failures instead of raising"""
+
+    def __init__(self, **kwargs: Any):
+        super().__init__(**kwargs)
+        self.client.search = with_retries(self.client.search, SEARCH_LIMITER)
+
+    def _run(self, **kwargs: Any) -> Any:
+        key = json.dumps({
+            "search_query": ' '.join(str(kwargs.get("search_query") or '').casefold().split()),
+            "location": kwargs.get("location"),
+        }, sort_keys=True)
+        cached = SEARCH_CACHE.get(key)
+        if cached is not None:
+            return cached
+        # Hand the agent an error result it can work around rather than aborting the crew
+        try:
+            results = super()._run(**kwargs)
+        except Exception as e:
+            return {"error": str(e), "search_query": kwargs.get("search_query")}
+        # Failed searches come back as an error string and are not cached
+        if isinstance(results, dict):
+            SEARCH_CACHE.set(key, results)
+        return results
+
+
+class ResilientFirecrawlScrapeWebsiteTool(FirecrawlScrapeWebsiteTool):
+    """Firecrawl scrape that rate limits and retries API calls, and reports failures instead of raising"""
+
+    def __init__(self, api_key: Optional[str] = None, **kwargs: Any):
+        super().__init__(api_key=api_key, **kwargs)
+        self._firecrawl.scrape = with_retries(self._firecrawl.scrape, SCRAPE_LIMITER)
+
+    def _run(self, url: str) -> Any:
+        key = f"{url}|{json.dumps(self.config, sort_keys=True, default=str)}"
+        cached = SCRAPE_CACHE.get(key)
+        if cached is not None:
+            return cached
+        try:
+            page = super()._run(url)
+        except Exception as e:
+            return {"error": str(e), "url": url}
+        # Agents see tool output as text, so the page is cached in that form
+        page = str(page)
+        SCRAPE_CACHE.set(key, page)
+        return page
+
+
+def run_concurrently(func: Callable, items: List[Any], max_workers: int) -> List[Any]:
+    """Map func over items in parallel threads, preserving order"""
+    # Tool calls are network-bound, so a batch takes about as long as its slowest item
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(items)))) as executor:
+        return list(executor.map(func, items))
+
+
+class BatchScrapeInput(BaseModel):
+    urls: List[str] = Field(..., description="URLs of the pages to scrape")
+
+
+class BatchScrapeWebsiteTool(BaseTool):
+    """Scrape several pages concurrently through a single-page scrape tool"""
+    name: str = "Batch scrape websites"
+    description: str = (
+        "Scrape several web pages at once and return the content of each, headed by its URL. "
+        "Use this instead of scraping pages one at a time."
+    )
+    args_schema: Type[BaseModel] = BatchScrapeInput
+    scrape_tool: BaseTool
+    max_workers: int = 8
+
+    def _run(self, urls: List[str]) -> str:
+        pages = run_concurrently(self._scrape_one, urls, self.max_workers)
+        return '\n\n'.join(f"## {url}\n\n{page}" for url, page in zip(urls, pages))
+
+    def _scrape_one(self, url: str) -> str:
+        # One failed page should not cost the agent the rest of the batch
+        try:
+            return str(self.scrape_tool.run(url=url))
+        except Exception as e:
+            return f"Error scraping {url}: {e}"
+
+
+class BatchSearchInput(BaseModel):
+    search_queries: List[str] = Field(..., description="Google search queries to run together")
+
+
+class BatchSearchTool(BaseTool):
+    """Run several searches concurrently through a single-query search tool"""
+    name: str = "Batch Google search"
+    description: str = (
+        "Run several Google searches at once and return the results of each, headed by its query. "
+        "Use this to search all the source categories together instead of one query at a time."
+    )
+    args_schema: Type[BaseModel] = BatchSearchInput
+    search_tool: BaseTool
+    max_workers: int = 6
+
+    def _run(self, search_queries: List[str]) -> str:
+        results = run_concurrently(self._search_one, search_queries, self.max_workers)
+        return '\n\n'.join(f"## {query}\n\n{result}" for query, result in zip(search_queries, results))
+
+    def _search_one(self, search_query: str) -> str:
+        try:
+            return str(self.search_tool.run(search_query=search_query))
+        except Exception as e:
+            return f"Error searching for {search_query}: {e}"
@@ -1,6 +1,19 @@
 import streamlit as st
+import html
 import re
+from functools import lru_cache
+from dotenv import load_dotenv
 
+# Leading "1. " style numbering on a line
+_NUMBERING_RE = re.compile(r'^\d+\.\s*', re.MULTILINE)
+# Source list entry: - Title - [text](url)
+_SOURCE_LINE_RE = re.compile(r'- (.*?) - \[(.*?)\]\((.*?)\)')
+
+
+@lru_cache(maxsize=None)
+def load_environment():
+    """Load the .env file once per process rather than on every script rerun"""
+    load_dotenv()
 
 def setup_page_config():
     """Configure the Streamlit page settings"""
@@ -10,233 +23,159 @@ def setup_page_config():
         layout="wide"
     )
 
+# The stylesheet lives in static/report.css and is served by Streamlit's static
+# file serving, so browsers cache it instead of receiving it inline on every
+# rerun. Bump the version whenever the stylesheet changes.
+_CUSTOM_CSS = '<link rel="stylesheet" href="app/static/report.css?v=1">'
+
 def apply_custom_css():
     """Apply custom CSS for better markdown rendering"""
-    st.markdown("""
-        <style>
-        /* Reset and base styles */
-        * {
-            margin: 0;
-            padding: 0;
-            box-sizing: border-box;
-        }
-
-        /* Top Navigation Bar */
-        .nav-bar {
-            position: fixed;
-            top: 0;
-            left: 0;
-            right: 0;
-            height: 60px;
-            background: white;
-            padding: 0 24px;
-            display: flex;
-            align-items: center;
-            justify-content: space-between;
-            border-bottom: 1px solid #e0e0e0;
-            z-index: 1000;
-        }
-
-        .back-button {
-            display: flex;
-            align-items: center;
-            color: #333;
-            text-decoration: none;
-            font-size: 14px;
-            font-weight: 500;
-        }
-
-        .download-button {
-            background: #2E7D32;
-            color: white;
-            padding: 8px 16px;
-            border-radius: 4px;
-            text-decoration: none;
-            font-size: 14px;
-            font-weight: 500;
-        }
-
-        /* Main Layout */
-        .report-container {
-            display: flex;
-            margin-top: 60px;
-            height: calc(100vh - 60px);
-        }
-
-        /* Sidebar Navigation */
-        .sidebar {
-            width: 280px;
-            background: #f8f9fa;
-            border-right: 1px solid #e0e0e0;
-            padding: 24px;
-            height: 100%;
-            overflow-y: auto;
-            flex-shrink: 0;
-        }
-
-        .sidebar h3 {
-            color: #333;
-            font-size: 16px;
-            margin-bottom: 16px;
-            font-weight: 600;
-        }
-
-        .nav-links {
-            list-style: none;
-        }
-
-        .nav-item {
-            display: block;
-            padding: 8px 0;
-            color: #666;
-            text-decoration: none;
-            font-size: 14px;
-            transition: color 0.2s;
-        }
-
-        .nav-item:hover {
-            color: #2E7D32;
-        }
-
-        /* Main Content */
-        .content {
-            flex: 1;
-            padding: 32px 48px;
-            overflow-y: auto;
-        }
-
-        /* Typography */
-        h1 {
-            font-size: 24px;
-            color: #333;
-            margin-bottom: 24px;
-        }
-
-        h2 {
-            font-size: 20px;
-            color: #333;
-            margin: 32px 0 16px;
-        }
-
-        h3 {
-            font-size: 18px;
-            color: #333;
-            margin: 24px 0 12px;
-        }
-
-        p {
-            font-size: 16px;
-            color: #444;
-            line-height: 1.6;
-            margin-bottom: 16px;
-        }
-
-        /* Lists */
-        ul {
-            margin: 16px 0;
-            padding-left: 24px;
-        }
-
-        li {
-            font-size: 16px;
-            color: #444;
-            line-height: 1.6;
-            margin-bottom: 12px;
-        }
-
-        /* Source Links */
-        .source-link {
-            color: #2E7D32;
-            text-decoration: none;
-            font-weight: 500;
-        }
-
-        .source-link:hover {
-            text-decoration: underline;
-        }
-
-        /* Sources Section */
-        .sources-section {
-            margin-top: 40px;
-            border-top: 1px solid #e0e0e0;
-            padding-top: 24px;
-        }
-
-        .source-category {
-            margin-bottom: 24px;
-        }
-
-        .source-category h3 {
-            color: #333;
-            font-size: 18px;
-            margin-bottom: 16px;
-        }
-
-        .source-item {
-            margin-bottom: 12px;
-            line-height: 1.6;
-        }
-
-        .source-title {
-            font-weight: 500;
-            color: #333;
-            margin-right: 8px;
-        }
-        </style>
-    """, unsafe_allow_html=True)
+    st.markdown(_CUSTOM_CSS, unsafe_allow_html=True)
+
+# Help tooltip shown next to the research query input; its styles live in
+# static/search.css so only the markup is sent on each rerun
+_QUERY_HELP_HTML = """
+    <link rel="stylesheet" href="app/static/search.css?v=1">
+    <div class="tooltip">
+        <span class="help-icon">❔</span>
+        <span class="tooltiptext">
+            <strong>You can include:</strong><br>
+            • Company name<br>
+            • Industry or domain<br>
+            • Specific aspects you're interested in<br><br>
+            <strong>Sample queries:</strong><br>
+            • "Overview of Delfi Diagnostics Early Cancer Detection"<br>
+            • "Market analysis of Tesla in electric vehicles"<br>
+            • "Moderna's COVID vaccine development and market position"
+        </span>
+    </div>
+"""
+
+def render_query_help():
+    """Render the help tooltip describing what a research query can contain"""
+    st.markdown(_QUERY_HELP_HTML, unsafe_allow_html=True)
+
+# Spaces become dashes; every other ASCII character outside [a-z0-9-] is dropped
+_SECTION_ID_TABLE = str.maketrans(
+    {c: None for c in map(chr, range(128)) if c not in 'abcdefghijklmnopqrstuvwxyz0123456789-'}
+    | {' ': '-'}
+)
 
 def create_section_id(header, index=None):
     """Create a valid HTML ID from a header, including index if provided"""
-    base_id = re.sub(r'[^a-z0-9-]', '', header.lower().replace(' ', '-'))
+    base_id = header.lower().translate(_SECTION_ID_TABLE)
+    if not base_id.isascii():
+        base_id = base_id.encode('ascii', 'ignore').decode('ascii')
     return f"{index}-{base_id}" if index is not None else base_id
 
+# A header tag in rendered HTML, with its level and inner HTML
+_HTML_HEADER_RE = re.compile(r'<h([1-6])>(.*?)</h\1>')
+_HTML_TAG_RE = re.compile(r'<[^>]+>')
+
+def _wrap_header(match, headers):
+    """Wrap a rendered header in its section anchor, collecting its level and text"""
+    level = int(match.group(1))
+    text = html.unescape(_HTML_TAG_RE.sub('', match.group(2)))
+    headers.append((level, text))
+    section_id = create_section_id(text)
+    return (f'<div id="{section_id}" class="section-header level-{level}">\n'
+            f'{match.group(0)}\n'
+            f'</div>')
+
+@st.cache_data(show_spinner=False, max_entries=8)
+def render_and_toc(content):
+    """Render markdown content to HTML and collect its (level, text) headers in one pass"""
+    # Imported on first render; most reruns are served from the cache
+    import markdown
+
+    headers = []
+    renderer = markdown.Markdown(extensions=['tables', 'sane_lists'])
+    # The content is LLM output built from scraped pages and the result is shown
+    # with unsafe_allow_html, so raw HTML in it is escaped rather than passed through
+    renderer.preprocessors.deregister('html_block')
+    renderer.inlinePatterns.deregister('html')
+    rendered = renderer.convert(content)
+    rendered = _HTML_HEADER_RE.sub(lambda match: _wrap_header(match, headers), rendered)
+    return rendered, headers
+
 def process_markdown(content):
     """Process markdown content with better formatting"""
-    lines = content.split('\n')
-    processed_lines = []
-    in_list = False
-    current_section = None
-    
-    for line in lines:
-        if line.strip().startswith('#'):
-            if in_list:
-                processed_lines.append('</ul>')
-                in_list = False
-            level = len(line) - len(line.lstrip('#'))
-            text = line.strip('#').strip()
-            section_id = create_section_id(text)
-            processed_lines.append(f'<div id="{section_id}" class="section-header level-{level}">')
-            processed_lines.append(f'<h{level}>{text}</h{level}>')
-            processed_lines.append('</div>')
-            current_section = text
-        elif line.strip().startswith('**'):
-            # Handle bold headers within sections
-            text = line.strip('*').strip()
-            processed_lines.append(f'<h3 class="subsection-header">{text}</h3>')
-        elif line.strip().startswith('- '):
-            if not in_list:
-                processed_lines.append('<ul class="content-list">')
-                in_list = True
-            text = line.strip('- ').strip()
-            if 'source:' in text.lower():
-                # Format source links
-                text = re.sub(r'\[(.*?)\]\((.*?)\)', r'<a href="\2" class="source-link">\1</a>', text)
-            processed_lines.append(f'<li>{text}</li>')
-        elif line.strip():
-            if in_list:
-                processed_lines.append('</ul>')
-                in_list = False
-            processed_lines.append(f'<p>{line}</p>')
-        else:
-            if in_list:
-                processed_lines.append('</ul>')
-                in_list = False
-            processed_lines.append('<br>')
-    
-    if in_list:
-        processed_lines.append('</ul>')
-    
-    return '\n'.join(processed_lines)
+    return render_and_toc(content)[0]
+
+def extract_headers(content):
+    """Extract (level, text) pairs for every markdown header in the content"""
+    return render_and_toc(content)[1]
+
+# Start of every header line, capturing its run of leading '#'
+_HEADER_LINE_RE = re.compile(r'^[^\S\n]*(#+)', re.MULTILINE)
+
+def tokenize_report(content):
+    """Split a report into (level, title, section_id, markdown) sections in one pass over its header lines"""
+    # The first token is the title line, which the body does not render; level 0
+    # marks a section that does not start with a header
+    body_start = content.find('\n') + 1
+    if not body_start:
+        return [(_line_level(content), content.strip('#').strip(), None, content)]
+
+    tokens = [(_line_level(content), content[:body_start - 1].strip('#').strip(), None, '')]
+    section_start = body_start
+    for match in _HEADER_LINE_RE.finditer(content, body_start):
+        if match.start() > section_start:
+            tokens.append(_section_token(content[section_start:match.start() - 1], len(tokens), strip_numbering=True))
+            section_start = match.start()
+    tokens.append(_section_token(content[section_start:], len(tokens), strip_numbering=False))
+    return tokens
+
+def _line_level(text):
+    """Header level of the text's first line, or 0 when it is not a header"""
+    match = _HEADER_LINE_RE.match(text)
+    return len(match.group(1)) if match else 0
+
+def _section_token(text, index, strip_numbering):
+    """Build the token for one report section starting at a header line"""
+    first_line = text.split('\n', 1)[0]
+    title = first_line.strip('#').strip()
+    if strip_numbering:
+        text = _NUMBERING_RE.sub('', text)
+    return _line_level(first_line), title, create_section_id(title, index), text
+
+def build_nav_html(tokens):
+    """Build the quick-links navigation for the report's top-level sections as one HTML string"""
+    links = []
+    for level, title, section_id, _ in tokens[1:]:
+        if level != 2:
+            continue
+        title = _NUMBERING_RE.sub('', title)
+        if title.lower().startswith(('comprehensive', 'market research', 'generated')):
+            continue
+        links.append(
+            f'<a href="#{section_id}" '
+            f'style="color: #333; text-decoration: none; display: block; padding: 5px 0; '
+            f'transition: color 0.2s;" '
+            f'onmouseover="this.style.color=\'#2E7D32\'" '
+            f'onmouseout="this.style.color=\'#333\'">'
+            f'{html.escape(title)}'
+            f'</a>'
+        )
+    return '\n'.join(links)
+
+def build_report_blocks(tokens):
+    """Group the report body's sections into one (title, [(section_id, markdown)]) block per h1/h2 section"""
+    # The markdown is LLM output built from scraped pages, so it is kept apart
+    # from the anchor for rendering without unsafe_allow_html
+    blocks = []
+    block = []
+    block_title = None
+    for level, title, section_id, text in tokens[1:]:
+        if 0 < level <= 2 and block:
+            blocks.append((block_title, block))
+            block = []
+        if not block:
+            block_title = _NUMBERING_RE.sub('', title)
+        block.append((section_id, f'{text}\n\n---'))
+    if block:
+        blocks.append((block_title, block))
+    return blocks
 
 def format_sources_section(content):
     """Format the sources section"""
@@ -245,7 +184,7 @@ def format_sources_section(content):
     
     for line in content.split('\n'):
         if line.strip().startswith('- '):
-            match = re.match(r'- (.*?) - \[(.*?)\]\((.*?)\)', line.strip())
+            match = _SOURCE_LINE_RE.match(line.strip())
             if match:
                 title, text, url = match.groups()
                 sources.append({
@@ -264,18 +203,18 @@ def format_sources_section(content):
         categories[cat].append(source)
     
     # Generate HTML
-    html = ['<div class="sources-section">']
+    parts = ['<div class="sources-section">']
     for category, items in categories.items():
-        html.append(f'<div class="source-category">')
-        html.append(f'<h3>{category}</h3>')
+        parts.append(f'<div class="source-category">')
+        parts.append(f'<h3>{category}</h3>')
         for item in items:
-            html.append(
+            parts.append(
                 f'<div class="source-item">'
                 f'<span class="source-title">{item["title"]}</span>'
                 f'<a href="{item["url"]}" class="source-link">{item["text"]}</a>'
                 f'</div>'
             )
-        html.append('</div>')
-    html.append('</div>')
+        parts.append('</div>')
+    parts.append('</div>')
     
-    return '\n'.join(html)
+    return '\n'.join(parts)